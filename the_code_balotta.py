@@ -1,42 +1,57 @@
-from csv import reader
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+from bisect import bisect_left
+from calendar import monthrange
+from datetime import date, timedelta
 import networkx as nx
+import numpy as np
+import operator
+import pandas as pd
 import re
+from weakref import WeakKeyDictionary
+
+
+# Structures derived from each graph, computed only once and dropped together with the graph.
+# A graph must not be modified after it has been passed to the do_ functions: to query a modified graph, first remove it with graph_caches.pop(data, None)
+graph_caches = WeakKeyDictionary()
+timespan_pattern = re.compile(r'^(-?)P(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)D)?')  # Sign, years, months and days of an ISO 8601 duration (e.g. P1Y2M3D). Every part is optional, so P2M means two months, not two years
 
 
 def process_citations(citation_file_path):  # Takes in input a CSV file and returns a data structure with all the data included in the CSV
     data = nx.DiGraph()                                                 # Data structure is a Directed Graph
-    with open(citation_file_path, 'r', encoding='utf-8') as csvfile:
-        csv_reader = reader(csvfile)                                    # csv_reader is an iterator over the lines of the CSV file, where each line is a list of strings
-        next(csv_reader)                                                # Skips the first line containing the column headings
-        for row in csv_reader:                                          # One row at a time is read, each row is a list of strings
-            if len(row) == 4:                                           # Checks if the current row has the right amount of fields
-                if row[0] not in data:                                  # row[0] is the "citing" column
-                    data.add_node(row[0], creation=row[2])              # row[2] is "creation" date, and it is related to the document, so it's an attribute of the node
-                if row[1] not in data:                                  # row[1] is the "cited" column
-                    data.add_node(row[1], creation=find_cited_date(row[2], row[3]))  # Creates the "cited" node and calculates its creation date
-                data.add_edge(row[0], row[1], timespan=row[3])          # row[3] is "timespan", that is a time difference between the two documents, so it's an attribute of the edge
+    citations = pd.read_csv(citation_file_path, encoding='utf-8', dtype=str, na_filter=False, engine='c',
+                            header=None, index_col=False, on_bad_lines='skip')  # Parses the whole CSV in C. The headings are read as a row, so their 4 fields are the expected ones and the rows with more fields are skipped
+    citations = citations.iloc[1:]                                      # Skips the first line containing the column headings
+    citations.columns = ['citing', 'cited', 'creation', 'timespan']
+    citations = citations[(citations != '').all(axis=1)]                # Skips the rows with missing fields
+
+    dois = citations[['citing', 'cited']].to_numpy().ravel()            # Alternates citing and cited DOIs row by row, to keep the order in which they appear in the CSV
+    first_seen = ~pd.Series(dois).duplicated().to_numpy()               # Marks the first appearance of every DOI, that is where its node is created
+    cited_first_seen = first_seen[1::2]                                 # Rows where the "cited" DOI appears for the first time
+    creations = np.empty(len(dois), dtype=object)
+    creations[0::2] = citations['creation'].to_numpy()                  # "creation" date is related to the citing document, so it's an attribute of the node
+    pair_codes, pairs = pd.MultiIndex.from_frame(citations.loc[cited_first_seen, ['creation', 'timespan']]).factorize()  # The same pairs of date and timespan recur often, so each one is calculated only once
+    cited_dates = find_cited_dates(pd.Series(pairs.get_level_values(0), dtype=object), pd.Series(pairs.get_level_values(1), dtype=object))
+    creations[1::2][cited_first_seen] = cited_dates.to_numpy()[pair_codes]  # Calculates all together the creation dates of the new "cited" nodes
+
+    data.add_nodes_from((doi, {'creation': creation}) for doi, creation in zip(dois[first_seen], creations[first_seen]))  # Adds all the nodes with a single call
+    data.add_edges_from((citing, cited, {'timespan': timespan}) for citing, cited, timespan
+                        in citations[['citing', 'cited', 'timespan']].itertuples(index=False, name=None))  # "timespan" is a time difference between the two documents, so it's an attribute of the edge
     return data
 
 
 def do_compute_impact_factor(data, dois, year):                         # Calculates the Impact Factor of the dois in the year
-    citing_cntr = 0                                                     # Counter of citing documents (numerator)
-    previous_years_dois_cntr = 0                                        # Counter of dois published in the past two years (denominator)
     year = int(year)                                                    # Makes sure that it's a number, because later we will compare it with numbers, not strings
-    for doi in dois:                                                    # For each DOI in the dois set...
-        if doi in data:                                                 # Checks if each requested DOI is inside the data structure
+    year_arrays = get_cached(data, 'years', build_years)                # Publication year of every node, with the index giving the position of each node
+    index = year_arrays['index']
+    years = year_arrays['years']
+    dois = [doi for doi in dois if doi in data]                         # Keeps only the requested DOIs inside the data structure
 
-            # This part is to find into 'data' the citations all the documents in dois have received in year 'year'
-            predecessor_dois = data.predecessors(doi)                   # Gets all the predecessors of the current DOI
-            for citing in predecessor_dois:                             # For each node of the edges incoming to the current DOI...
-                if int(data.nodes[citing]['creation'][0:4]) == year:    # Extracts the year from the creation date string of a citing document, converts it to a number and compares it to the year parameter
-                    citing_cntr += 1                                    # Increases the counter of citing documents if creation date is in the required year
+    # This part is to find into 'data' the citations all the documents in dois have received in year 'year'
+    citing = index.get_indexer([citing for doi in dois for citing in data.pred[doi]])  # Positions of the predecessors of all the DOIs, gathered in a single array
+    citing_cntr = int(np.count_nonzero(years[citing] == year))          # Counts all together the citing documents whose creation date is in the required year
 
-            # This part is to find the number of documents in dois published in the previous two years
-            doi_creation_year = int(data.nodes[doi]['creation'][0:4])   # Extracts the year from the creation date of the current DOI
-            if doi_creation_year == year-1 or doi_creation_year == year-2:
-                previous_years_dois_cntr += 1                           # Increases the counter of documents published in the past two years
+    # This part is to find the number of documents in dois published in the previous two years
+    doi_creation_years = years[index.get_indexer(dois)]
+    previous_years_dois_cntr = int(np.count_nonzero((doi_creation_years == year-1) | (doi_creation_years == year-2)))  # Counter of dois published in the past two years (denominator)
 
     if previous_years_dois_cntr == 0:                                   # If there are no dois in the previous two years, returns None
         return None
@@ -45,20 +60,20 @@ def do_compute_impact_factor(data, dois, year):                         # Calcul
 
 def do_get_co_citations(data, doi1, doi2):  # Returns an integer defining how many times the two input documents are cited together by other documents
     if doi1 in data and doi2 in data:
-        predecessors_doi1 = set(data.predecessors(doi1))                    # Creates a set with the predecessors of doi1
-        predecessors_doi2 = set(data.predecessors(doi2))                    # Creates a set with the predecessors of doi2
-        citing_both = predecessors_doi1.intersection(predecessors_doi2)     # Gets only the documents the two sets have in common
-        return len(citing_both)                                             # Returns the number of common elements
+        if data.in_degree(doi1) > data.in_degree(doi2):
+            doi1, doi2 = doi2, doi1                                         # Makes doi1 the document with fewer predecessors
+        predecessors_doi2 = data.pred[doi2]                                 # The predecessors of doi2 are already stored as keys of a dictionary, so no set is needed
+        return sum(1 for citing in data.predecessors(doi1) if citing in predecessors_doi2)  # Counts the predecessors of doi1 that are also predecessors of doi2
     else:
         return 0
 
 
 def do_get_bibliographic_coupling(data, doi1, doi2):  # Returns an integer defining how many times the two input documents cite both the same document
     if doi1 in data and doi2 in data:
-        successors_doi1 = set(data.successors(doi1))                  # Creates a set of edges outgoing from doi1
-        successors_doi2 = set(data.successors(doi2))                  # Creates a set of edges outgoing from doi2
-        cited_both = successors_doi1.intersection(successors_doi2)    # Gets only the documents the two sets have in common
-        return len(cited_both)                                        # Returns the number of common elements
+        if data.out_degree(doi1) > data.out_degree(doi2):
+            doi1, doi2 = doi2, doi1                                   # Makes doi1 the document with fewer successors
+        successors_doi2 = data.succ[doi2]                             # The successors of doi2 are already stored as keys of a dictionary, so no set is needed
+        return sum(1 for cited in data.successors(doi1) if cited in successors_doi2)  # Counts the successors of doi1 that are also successors of doi2
     else:
         return 0
 
@@ -66,15 +81,21 @@ def do_get_bibliographic_coupling(data, doi1, doi2):  # Returns an integer defin
 def do_get_citation_network(data, start, end):  # Returns a directed graph containing all the articles involved in citations if both of them have been published within the input start-end interval (start and end included)
     start = str(start)                          # To make sure we are working with strings
     end = str(end)                              # To make sure we are working with strings
-    eligible_edges = list()
     result = nx.DiGraph()
-    if (start <= end) and (len(start) == len(end) == 4):                                # Some check over the passed parameters
-        for from_node, to_node in data.edges():                                         # Iterates over the whole graph
-            from_node_year = data.nodes[from_node]['creation'][0:4]                     # Extracts the year of the citing node
-            to_node_year = data.nodes[to_node]['creation'][0:4]                         # Extracts the year of the cited node
-            if (start <= from_node_year <= end) and (start <= to_node_year <= end):     # If both documents have been published in the start-end interval
-                eligible_edges.append((from_node, to_node))                             # Adds the edge (and its nodes) to a list
-        result.add_edges_from(eligible_edges)                                           # Populates the resulting DiGraph from the list
+    if start.isdigit() and end.isdigit() and (start <= end) and (len(start) == len(end) == 4):  # Some check over the passed parameters
+        start = int(start)                                                              # Compares the years as numbers from now on
+        end = int(end)
+        arrays = get_cached(data, 'arrays', build_arrays)                               # Edges of the graph as NumPy arrays
+        year_arrays = get_cached(data, 'years', build_years)                            # Publication year of every node, in the same order
+        year_range = year_arrays['year_range']
+        if year_range is not None and start <= year_range[0] and end >= year_range[1]:
+            result.add_edges_from(data.edges())                                         # The interval covers every document, so all the edges are eligible
+            return result
+        years = year_arrays['years']
+        in_interval = (years >= start) & (years <= end)                                 # Selects once the documents published in the start-end interval
+        mask = in_interval[arrays['src']] & in_interval[arrays['dst']]                  # Selects all together the edges whose documents are both in the interval
+        nodes = arrays['nodes']
+        result.add_edges_from(zip(nodes[arrays['src'][mask]], nodes[arrays['dst'][mask]]))  # Populates the resulting DiGraph converting the positions back to DOIs
     return result
 
 
@@ -86,29 +107,55 @@ def do_merge_graphs(data, g1, g2):  # Returns a new graph being the merge of the
 
 
 def do_search_by_prefix(data, prefix, is_citing):
-    slashpos = len(prefix)        # To avoid to run the len function multiple times later
-    filtered_edges = list()
-    for x, y in data.edges():
-        if (is_citing and x.startswith(prefix) and (x.find("/")) == slashpos) or \
-                (not is_citing and y.startswith(prefix) and (y.find("/")) == slashpos):
-            filtered_edges.append((x, y))
-    return data.edge_subgraph(filtered_edges)
+    matched = list()
+    if "/" not in prefix:                                               # The prefix is what comes before the first slash, so it can't contain one
+        sorted_nodes = get_cached(data, 'sorted_nodes', sorted)         # DOIs in alphabetical order, so the ones with the same prefix are contiguous
+        first = bisect_left(sorted_nodes, prefix + "/")                 # First DOI starting with the prefix and the slash
+        last = bisect_left(sorted_nodes, prefix + "0")                  # "0" comes right after "/" in the character table, so this is the first DOI after them
+        matched = sorted_nodes[first:last]
+    if is_citing:
+        filtered_edges = data.out_edges(matched, data=True)             # Citations made by the matched documents
+    else:
+        filtered_edges = data.in_edges(matched, data=True)              # Citations received by the matched documents
+    return build_subgraph(data, filtered_edges)
 
 
 def do_search(data, query, field):      # Returns a sub-collection of citations in data where the query matched on the input field. It is possible to use wildcards in the query. If no wildcards are used, there should be a complete match with the string in query to return that citation in the results
-    requery = translate_query_string_for_search(query)           # Converts the query into an evaluable expression
-    filtered_edges = get_filtered_list(data, requery, field)
-    return data.edge_subgraph(filtered_edges)
+    predicate = translate_query_string_for_search(query)         # Converts the query into a function telling if a value matches it
+    filtered_edges = get_filtered_list(data, predicate, field)
+    return build_subgraph(data, filtered_edges)
 
 
 def do_filter_by_value(data, query, field):      # Returns a sub-collection of citations in data where the query matched on the input field. No wildcarts are permitted in the query, only comparisons
-    requery = translate_query_string_for_filter(query)           # Converts the query into an evaluable expression
-    filtered_edges = get_filtered_list(data, requery, field)
-    return data.edge_subgraph(filtered_edges)
+    predicate = translate_query_string_for_filter(query)         # Converts the query into a function telling if a value matches it
+    filtered_edges = get_filtered_list(data, predicate, field)
+    return build_subgraph(data, filtered_edges)
 
 
 # ANCILLARY FUNCTIONS ################
 
+def get_cached(data, name, builder):    # Returns the structure called name derived from the graph, building it with builder(data) only the first time it is requested
+    cache = graph_caches.setdefault(data, dict())
+    if name not in cache:
+        cache[name] = builder(data)
+    return cache[name]
+
+
+def build_arrays(data):                 # Returns a dictionary of NumPy arrays with the position of the nodes of every edge
+    index = pd.Index(list(data), dtype=object)                          # Gives a number to every node, that is its position in the index
+    edges = list(data.edges())
+    src = index.get_indexer([from_node for from_node, _ in edges]).astype(np.int32)  # Position of the citing node of every edge
+    dst = index.get_indexer([to_node for _, to_node in edges]).astype(np.int32)      # Position of the cited node of every edge
+    return {'index': index, 'nodes': index.to_numpy(), 'src': src, 'dst': dst}
+
+
+def build_years(data):                  # Returns a dictionary with the index of the nodes, the publication year of every node in the same order, and the first and last of them
+    index = pd.Index(list(data), dtype=object)                          # Gives a number to every node, that is its position in the index
+    years = pd.Series([creation for _, creation in data.nodes(data='creation')], dtype=object).str.slice(0, 4).astype(np.int16).to_numpy()
+    year_range = (int(years.min()), int(years.max())) if len(years) else None  # None if the graph is empty
+    return {'index': index, 'years': years, 'year_range': year_range}
+
+
 def find_cited_date(citing_date, timespan):   # Returns the date of the cited document given the date of the citing and the timespan
     datelen = len(citing_date)
     if datelen == 7:
@@ -116,41 +163,97 @@ def find_cited_date(citing_date, timespan):   # Returns the date of the cited do
     elif datelen == 4:
         citing_date += "-01-01"         # Adds month and day to the string if citing_date has only the year
 
-    times = timespan.replace('Y', ':').replace('M', ':')[1:len(timespan)-1].replace('P', '').split(':')  # Creates a list with only the numbers of years, months (if any) and days (if any) to add or subtract
-    times = [-int(item) if timespan[0] == 'P' else int(item) for item in times]                          # Switches to negative values if the timespan is positive (that is, if the cited doc has been published BEFORE the citing doc)
-    citing_datetime = datetime.fromisoformat(citing_date)                           # Converts the date string to datetime format to enable operations
-    cited_date = citing_datetime + relativedelta(years=times[0])                    # Sums (or subtracts) the years
+    times = timespan_pattern.match(timespan)                                        # Extracts the numbers of years, months (if any) and days (if any) to add or subtract
+    sign = 1 if times and times.group(1) else -1                                    # Negative values if the timespan is positive (that is, if the cited doc has been published BEFORE the citing doc)
+    span_years, span_months, span_days = [sign * int(times.group(i) or 0) if times else 0 for i in (2, 3, 4)]
+    citing = date.fromisoformat(citing_date)                                        # Converts the date string to date format to enable operations
 
-    try:                                                                            # Months and days could not be specified in the timespan, so I put it inside a try rather than check before
-        cited_date = cited_date + relativedelta(months=times[1])                    # Sums (or subtracts) the months
-        cited_date = cited_date + relativedelta(days=times[2])                      # Sums (or subtracts) the days
-    except IndexError:
-        pass                                                                        # If it couldn't add the months and the days. does nothing
+    year = citing.year + span_years                                                 # Sums (or subtracts) the years...
+    day = min(citing.day, monthrange(year, citing.month)[1])                        # ...moving to the last day of the month if it doesn't exist anymore (e.g. 29th of February)
+    year, month = divmod(year * 12 + citing.month - 1 + span_months, 12)            # Sums (or subtracts) the months, counting them from year 0
+    month += 1
+    day = min(day, monthrange(year, month)[1])
+    cited_date = date(year, month, day) + timedelta(days=span_days)                 # Sums (or subtracts) the days
 
-    return str(cited_date.date())[:datelen]       # Return a string of the same format of the citing_date (YYYY-MM-DD or YYYY-MM or YYYY)
+    return cited_date.isoformat()[:datelen]       # Return a string of the same format of the citing_date (YYYY-MM-DD or YYYY-MM or YYYY)
 
 
-def evaluate_query_string(requery, fieldvalue):   # Evaluates the complete query string with the field value
-    try:
-        result = bool(eval(requery.format(fieldvalue)))
-    except:
-        result = False
+def find_cited_dates(citing_dates, timespans):  # Vectorized version of find_cited_date: returns a Series with the dates of the cited documents given two Series of citing dates and timespans
+    datelens = citing_dates.str.len().to_numpy()
+    date_parts = citing_dates.str.extract(r'^(\d{4})(?:-(\d{2}))?(?:-(\d{2}))?').fillna('1').astype(np.int64)  # Year, month and day of every date, completing the missing month and day with 1
+    years, months, days = (date_parts[col].to_numpy() for col in date_parts)
+
+    times = timespans.str.extract(timespan_pattern.pattern)              # Sign, years, months and days of every timespan
+    sign = np.where(times[0] == '-', 1, -1)                             # Negative values if the timespan is positive (that is, if the cited doc has been published BEFORE the citing doc)
+    span_years, span_months, span_days = (times[col].fillna('0').astype(np.int64).to_numpy() * sign for col in (1, 2, 3))
+
+    years = years + span_years                                          # Sums (or subtracts) the years...
+    days = np.minimum(days, get_month_lengths(years, months))           # ...moving to the last day of the month if it doesn't exist anymore (e.g. 29th of February)
+    month_counts = years * 12 + months - 1 + span_months                # Sums (or subtracts) the months, counting them from year 0
+    years, months = month_counts // 12, month_counts % 12 + 1
+    days = np.minimum(days, get_month_lengths(years, months))
+    cited_dates = get_month_starts(years, months) + (days - 1 + span_days)  # Sums (or subtracts) the days starting from the first day of the month
+
+    cited_dates = pd.Series(np.datetime_as_string(cited_dates, unit='D'), index=citing_dates.index)
+    return cited_dates.where(datelens == 10, cited_dates.str.slice(0, 7).where(datelens == 7, cited_dates.str.slice(0, 4)))  # Same format of the citing dates (YYYY-MM-DD or YYYY-MM or YYYY)
+
+
+def get_month_starts(years, months):   # Returns an array with the first day of each year and month as numpy datetime64
+    return ((years - 1970) * 12 + months - 1).astype('datetime64[M]').astype('datetime64[D]')
+
+
+def get_month_lengths(years, months):  # Returns an array with the number of days of each year and month
+    return (get_month_starts(years, months + 1) - get_month_starts(years, months)).astype(np.int64)
+
+
+def build_subgraph(data, edges):    # Returns a new DiGraph with the edges (each one with its attributes) and the attributes of their nodes taken from data
+    result = nx.DiGraph()
+    result.add_edges_from(edges)
+    result.add_nodes_from([(node, data.nodes[node]) for node in result])
     return result
 
 
-def get_filtered_list(data, requery, field):    # For do_search and do_filter functions, looks inside the data structure based on the search field
-    filtered_edges = []
-    if field == 'citing' or field == 'cited':
-        filtered_edges = [(citing, cited) for citing, cited in data.edges()
-                          if (evaluate_query_string(requery, citing.lower())
-                              if field == 'citing' else evaluate_query_string(requery, cited.lower()))]
+def get_filtered_list(data, predicate, field):    # For do_search and do_filter functions, looks inside the data structure based on the search field and returns the matching edges with their attributes
+    if field == 'citing':
+        get_field = lambda citing, cited, attributes: citing.lower()
+    elif field == 'cited':
+        get_field = lambda citing, cited, attributes: cited.lower()
     elif field == 'creation':
-        filtered_edges = [(citing, cited) for citing, cited in data.edges()
-                          if evaluate_query_string(requery, data.nodes[citing]['creation'])]
+        creations = get_cached(data, 'creations', lambda graph: dict(graph.nodes(data='creation')))  # Creation date of every node, read with a single dictionary lookup
+        get_field = lambda citing, cited, attributes: creations[citing]
     elif field == 'timespan':
-        filtered_edges = [(citing, cited) for citing, cited, attributes in data.edges(data=True)
-                          if evaluate_query_string(requery, attributes['timespan'].lower())]
-    return filtered_edges
+        get_field = lambda citing, cited, attributes: attributes['timespan'].lower()
+    else:
+        return []
+    return [(citing, cited, attributes) for citing, cited, attributes in data.edges(data=True)
+            if predicate(get_field(citing, cited, attributes))]          # A single pass over the edges, whatever the field
+
+
+def build_query_predicate(wordlist, read_operand):  # Returns a function combining the operands of the query with 'not', 'and' and 'or', having the same precedence they have in Python
+    def parse_or(pos):
+        left, pos = parse_and(pos)
+        while pos < len(wordlist) and wordlist[pos] == 'or':
+            right, pos = parse_and(pos + 1)
+            left = lambda value, l=left, r=right: l(value) or r(value)
+        return left, pos
+
+    def parse_and(pos):
+        left, pos = parse_not(pos)
+        while pos < len(wordlist) and wordlist[pos] == 'and':
+            right, pos = parse_not(pos + 1)
+            left = lambda value, l=left, r=right: l(value) and r(value)
+        return left, pos
+
+    def parse_not(pos):
+        if pos < len(wordlist) and wordlist[pos] == 'not':
+            operand, pos = parse_not(pos + 1)
+            return (lambda value, o=operand: not o(value)), pos
+        return read_operand(wordlist, pos)          # Reads the operand starting at pos and returns it with the position following it
+
+    predicate, pos = parse_or(0)
+    if pos != len(wordlist):                        # Something that is neither an operator nor an operand has been left
+        raise ValueError('Invalid query')
+    return predicate
 
 
 def escape_query_string(querystring):       # Escapes special characters having a meaning for RegEx syntax (e.g the dot) PRESERVING THE STARS
@@ -161,32 +264,40 @@ def escape_query_string(querystring):       # Escapes special characters having
     return escstring[1:len(escstring)]      # Excludes the first asterisk that has been added
 
 
-def translate_query_string_for_search(query):       # Converts the query string to a logically evaluable one containing re.search function calls
-    wordlist = query.split()                        # Splits query by spaces
-    operators = ['and', 'or', 'not']                # List of the only possible operators
-    finaleval = ""
-    for word in wordlist:
-        if word not in operators:                       # For every string that is not an operator...
-            word = escape_query_string(word.lower())    # escapes the characters having a meaning for RegEx syntax
-            word = "^" + word.replace("*", ".*?") + "$" # Adds the characters needed by RegEx syntax
-            word = 're.search("'+word+'","{0}")'        # Adds the re.search() function call and its parameters
-        finaleval += ' '+word+' '                       # Adds the current token/operator to the final result
-    return finaleval
-
-
-def translate_query_string_for_filter(query):  # converts the query string to a logically evaluable one for do_filter function
+def read_search_term(wordlist, pos):        # Returns the function matching a single search term, using plain string comparisons when the wildcards allow it
+    if pos >= len(wordlist) or wordlist[pos] in ['and', 'or', 'not']:
+        raise ValueError('Search term expected')
+    word = wordlist[pos].lower()
+    stars = word.count("*")
+    if stars == 0:                                  # Without wildcards the term must be equal to the value
+        return (lambda value, w=word: value == w), pos + 1
+    if stars == 1 and word.endswith("*"):           # The value must start with the term
+        return (lambda value, w=word[:-1]: value.startswith(w)), pos + 1
+    if stars == 1 and word.startswith("*"):         # The value must end with the term
+        return (lambda value, w=word[1:]: value.endswith(w)), pos + 1
+    word = escape_query_string(word)                # escapes the characters having a meaning for RegEx syntax
+    pattern = re.compile(word.replace("*", ".*?"))  # Compiles the term only once, turning the stars into RegEx wildcards
+    return pattern.fullmatch, pos + 1               # The whole value has to match, with no need of anchors
+
+
+def translate_query_string_for_search(query):       # Converts the query string to a function telling if a value matches it
     wordlist = query.split()                        # Splits query by spaces
-    comp_op = ['<=', '>=', '==', '!=', '<', '>']    # List of operators
-
-    i = 0                           # Index of the positions of the compare operators
-    insertlist = []                 # List of the positions of the compare operators
-    for el in wordlist:             # Searches the list for compare operators
-        if el in comp_op:
-            insertlist.append(i)    # Stores the index of the compare operator
-            i += 1                  # For every compare op. I found, the index has to be incremented once more
-        i += 1
-    for el in insertlist:
-        wordlist.insert(el, '"{0}"')                    # Inserts the parameter "{0}" WITH QUOTES at the positions found before
-        wordlist[el+2] = '"' + wordlist[el+2] + '"'     # Adds quotes to the string after the operator
-
-    return ' '.join(wordlist).lower()           # Rebuilds the query with the parameters and the quotes and everything lowercase
+    try:
+        return build_query_predicate(wordlist, read_search_term)
+    except ValueError:
+        return lambda value: False                  # A malformed query matches nothing
+
+
+def read_comparison(wordlist, pos):         # Returns the function comparing a value with the string following a compare operator
+    comp_op = {'<=': operator.le, '>=': operator.ge, '==': operator.eq, '!=': operator.ne, '<': operator.lt, '>': operator.gt}  # Compare operators and the functions doing the comparison
+    if pos + 1 >= len(wordlist) or wordlist[pos] not in comp_op:
+        raise ValueError('Comparison expected')
+    return (lambda value, compare=comp_op[wordlist[pos]], threshold=wordlist[pos+1]: compare(value, threshold)), pos + 2
+
+
+def translate_query_string_for_filter(query):  # converts the query string to a function telling if a value satisfies the comparisons in it
+    wordlist = query.lower().split()                # Splits query by spaces, everything lowercase
+    try:
+        return build_query_predicate(wordlist, read_comparison)
+    except ValueError:
+        return lambda value: False                  # A malformed query matches nothing